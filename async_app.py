@@ -0,0 +1,287 @@
+"""
+Async front end for Reelify
+
+Serves the network-bound API routes from an aiohttp event loop, so a
+request waiting on Ollama, Gemini or trends24 holds a coroutine instead of
+a worker thread and one process can keep hundreds of upstream calls in
+flight. Translation is CPU-bound and runs on its own thread pool; every
+other route is passed through to the Flask app on a second pool.
+
+Sessions are shared with the Flask routes through the server-side session
+store, so both halves see the same trends and last story.
+
+Usage:
+    python async_app.py [--host 0.0.0.0] [--port 5000]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import aiohttp
+from aiohttp import web
+from werkzeug.http import http_date
+
+import app as reelify
+from app import (
+    run_blocking, sse_event, location_from_request, trends_response, story_fields_from_request, story_response,
+    story_done_event, story_text_from_request, decoding_options_from_request, translation_response, session_store,
+    story_generator, trend_refresher
+)
+
+# Upstream connections held open at once, across Ollama, Gemini and trends24
+HTTP_CONNECTION_LIMIT = int(os.environ.get("ASYNC_HTTP_LIMIT", "500"))
+
+translation_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TRANSLATION_WORKERS", "4")), thread_name_prefix="translation"
+)
+wsgi_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("WSGI_WORKERS", "16")), thread_name_prefix="wsgi"
+)
+
+class AsyncSession:
+    """The server-side session of one request, with the same cookie settings as the Flask routes.
+
+    The session store is SQLite, so it is read and written on worker threads.
+    """
+    def __init__(self, session_id, data):
+        self.new = data is None
+        self.session_id = reelify.secrets.token_urlsafe(32) if self.new else session_id
+        self.data = data or {}
+
+    @classmethod
+    async def open(cls, request):
+        interface = reelify.app.session_interface
+        session_id = request.cookies.get(interface.get_cookie_name(reelify.app))
+        data = await run_blocking(session_store.load, session_id) if session_id else None
+        return cls(session_id, data)
+
+    async def save(self, response, **values):
+        self.data.update(values)
+        await run_blocking(session_store.save, self.session_id, self.data)
+        if self.new:
+            flask_app = reelify.app
+            interface = flask_app.session_interface
+            expires = interface.get_expiration_time(flask_app, reelify.ServerSession(self.data))
+            response.set_cookie(
+                interface.get_cookie_name(flask_app),
+                self.session_id,
+                expires=http_date(expires) if expires else None,
+                httponly=interface.get_cookie_httponly(flask_app),
+                domain=interface.get_cookie_domain(flask_app),
+                path=interface.get_cookie_path(flask_app),
+                secure=interface.get_cookie_secure(flask_app),
+                samesite=interface.get_cookie_samesite(flask_app)
+            )
+            response.headers.add('Vary', 'Cookie')
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+def json_error(message, status):
+    return web.json_response({'success': False, 'error': message}, status=status)
+
+async def scrape_trends(request):
+    try:
+        data = await read_json(request) or {}
+        location = location_from_request(data)
+
+        # Serve the last good snapshot right away, revalidating in the background
+        snapshot = trend_refresher.lookup(location)
+        if snapshot is None:
+            snapshot = await trend_refresher.refresh_async(request.app['http'], location)
+        elif trend_refresher.is_stale(snapshot):
+            spawn(request.app, trend_refresher.refresh_async(request.app['http'], location))
+
+        body = trends_response(location, snapshot)
+        response = web.json_response(body)
+        session = await AsyncSession.open(request)
+        await session.save(response, current_trends=body['trends'], location=location)
+        return response
+
+    except Exception as e:
+        return json_error(str(e), 500)
+
+async def generate_story(request):
+    try:
+        data = await read_json(request) or {}
+        try:
+            tag, description, regenerate = story_fields_from_request(data)
+        except ValueError as e:
+            return json_error(str(e), 400)
+
+        story = await story_generator.generate_story_async(request.app['http'], tag, description, regenerate=regenerate)
+
+        response = web.json_response(story_response(tag, story))
+        session = await AsyncSession.open(request)
+        await session.save(response, last_generated_story=story)
+        return response
+
+    except Exception as e:
+        return json_error(str(e), 500)
+
+async def generate_story_stream(request):
+    data = await read_json(request) or {}
+    try:
+        tag, description, regenerate = story_fields_from_request(data)
+    except ValueError as e:
+        return json_error(str(e), 400)
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    session = await AsyncSession.open(request)
+    await session.save(response, last_generated_story=None)
+    await response.prepare(request)
+
+    parts = []
+    try:
+        async for token in story_generator.stream_story_async(request.app['http'], tag, description,
+                                                              regenerate=regenerate):
+            parts.append(token)
+            await response.write(sse_event({'token': token}).encode())
+    except (ConnectionResetError, asyncio.CancelledError):
+        raise
+    except Exception as e:
+        await response.write(sse_event({'error': str(e)}, event='error').encode())
+        return response
+
+    story, done_event = story_done_event(tag, parts)
+    # BEGIN IMMEDIATE can wait on the busy timeout, so it stays off the loop
+    await run_blocking(partial(session_store.update, session.session_id, last_generated_story=story))
+    await response.write(done_event.encode())
+    return response
+
+async def translate_story(request):
+    try:
+        data = await read_json(request) or {}
+        session = await AsyncSession.open(request)
+        text_to_translate = story_text_from_request(data, session.data)
+
+        if not text_to_translate:
+            return json_error('No text provided and no story found in session', 400)
+
+        try:
+            profile, latency_budget_ms = decoding_options_from_request(data)
+        except (TypeError, ValueError) as e:
+            return json_error(str(e), 400)
+
+        body = await asyncio.get_running_loop().run_in_executor(
+            translation_executor, translation_response, text_to_translate, profile, latency_budget_ms
+        )
+        return web.json_response(body)
+
+    except Exception as e:
+        return json_error(f'Translation failed: {str(e)}', 500)
+
+def wsgi_environ(request, body):
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': request.path,
+        'QUERY_STRING': request.query_string,
+        'SERVER_NAME': request.host.split(':')[0],
+        'SERVER_PORT': str(request.url.port or 80),
+        'SERVER_PROTOCOL': f"HTTP/{request.version.major}.{request.version.minor}",
+        'REMOTE_ADDR': request.remote or '',
+        'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': request.scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name in set(request.headers.keys()):
+        key = name.upper().replace('-', '_')
+        if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            continue
+        separator = '; ' if key == 'COOKIE' else ', '
+        environ[f"HTTP_{key}"] = separator.join(request.headers.getall(name))
+    return environ
+
+async def flask_passthrough(request):
+    """Run any other route through the Flask app on the WSGI pool, streaming its body."""
+    body = await request.read()
+    environ = wsgi_environ(request, body)
+    loop = asyncio.get_running_loop()
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = status
+        started['headers'] = headers
+
+    def call_app():
+        result = reelify.app(environ, start_response)
+        return result, iter(result)
+
+    result, chunks = await loop.run_in_executor(wsgi_executor, call_app)
+    status_code, _, reason = started['status'].partition(' ')
+    response = web.StreamResponse(status=int(status_code), reason=reason)
+    for name, value in started['headers']:
+        response.headers.add(name, value)
+
+    done = object()
+    try:
+        await response.prepare(request)
+        while True:
+            chunk = await loop.run_in_executor(wsgi_executor, next, chunks, done)
+            if chunk is done:
+                break
+            if chunk:
+                await response.write(chunk)
+        await response.write_eof()
+    finally:
+        if hasattr(result, 'close'):
+            await loop.run_in_executor(wsgi_executor, result.close)
+    return response
+
+def spawn(application, coroutine):
+    """Run a background task, keeping a reference so it isn't garbage collected mid-flight."""
+    task = asyncio.get_running_loop().create_task(coroutine)
+    application['tasks'].add(task)
+    task.add_done_callback(application['tasks'].discard)
+    task.add_done_callback(lambda task: task.cancelled() or task.exception() and print(
+        f"Background refresh failed: {task.exception()}"
+    ))
+
+async def open_http_session(application):
+    application['http'] = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=HTTP_CONNECTION_LIMIT))
+    application['tasks'] = set()
+
+async def close_http_session(application):
+    await application['http'].close()
+
+def create_app():
+    application = web.Application(client_max_size=4 * 1024 * 1024)
+    application.on_startup.append(open_http_session)
+    application.on_cleanup.append(close_http_session)
+    application.router.add_post('/api/scrape-trends', scrape_trends)
+    application.router.add_post('/api/generate-story', generate_story)
+    application.router.add_post('/api/generate-story/stream', generate_story_stream)
+    application.router.add_post('/api/translate-story', translate_story)
+    application.router.add_route('*', '/{tail:.*}', flask_passthrough)
+    return application
+
+def main():
+    parser = argparse.ArgumentParser(description="Async front end for the Reelify app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+    reelify.start_background_workers()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+End-to-end app benchmark with local stand-ins
+
+Runs the Flask app on a local port with every external dependency replaced
+by something offline and deterministic:
+
+- trends24 pages are served from the checked-in trends24_source.html
+- Ollama is a fake HTTP server producing tokens at a configurable rate
+- Gemini is a stub client with a fixed latency
+- translation uses a tiny randomly initialised M2M100 (NLLB config) model
+  with its own WordPiece tokenizer, built in the work directory
+
+It then reports p50/p95/p99 latency and throughput for /api/scrape-trends,
+/api/generate-story and /api/translate-story at each concurrency level.
+Only speed is meaningful; the generated text is nonsense.
+
+Usage:
+    python benchmark_app.py [--concurrency 1,4,16] [--requests 48] [--ollama-tokens-per-sec 200] [--server async]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+FIXTURE = os.path.abspath(os.path.join(os.path.dirname(__file__), "trends24_source.html"))
+OLLAMA_MODEL = "llama3.1:8b"
+
+WORDS = "this is a story about technology and how it shaping the future of pakistan".split()
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    """Ollama's /api/tags, /api/ps and /api/generate, plus trends24 location pages."""
+    protocol_version = "HTTP/1.1"
+    tokens_per_sec = 200
+    story_tokens = 100
+    # Ollama only decodes OLLAMA_NUM_PARALLEL requests at once
+    slots = threading.Semaphore(2)
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in ("/api/tags", "/api/ps"):
+            self.send_body(json.dumps({'models': [{'name': OLLAMA_MODEL, 'model': OLLAMA_MODEL}]}).encode(),
+                           "application/json")
+            return
+        with open(FIXTURE, "rb") as file:
+            self.send_body(file.read(), "text/html; charset=utf-8")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not payload.get("prompt"):
+            # Warm-up request
+            self.send_body(json.dumps({'response': '', 'done': True}).encode(), "application/json")
+            return
+
+        token_count = min(self.story_tokens, payload.get("options", {}).get("num_predict", self.story_tokens))
+        with self.slots:
+            start_time = time.perf_counter()
+            if payload.get("stream", True):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i in range(token_count + 1):
+                    done = i == token_count
+                    if not done:
+                        time.sleep(1 / self.tokens_per_sec)
+                    line = json.dumps({
+                        'response': '' if done else WORDS[i % len(WORDS)] + ' ',
+                        'done': done,
+                        'eval_count': token_count,
+                        'eval_duration': int((time.perf_counter() - start_time) * 1e9)
+                    }).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                time.sleep(token_count / self.tokens_per_sec)
+                self.send_body(json.dumps({
+                    'response': ' '.join(WORDS[i % len(WORDS)] for i in range(token_count)),
+                    'done': True,
+                    'eval_count': token_count,
+                    'eval_duration': int((time.perf_counter() - start_time) * 1e9)
+                }).encode(), "application/json")
+
+class StubGeminiResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubGenerativeModel:
+    latency = 0.2
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(self.latency)
+        return self.respond(prompt, generation_config)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        await asyncio.sleep(self.latency)
+        return self.respond(prompt, generation_config)
+
+    @staticmethod
+    def respond(prompt, generation_config):
+        description = "People are discussing this after a widely shared post."
+        if generation_config is None:
+            return StubGeminiResponse(description)
+        # Batched description prompt: answer for every trend on its "Trends: [...]" line
+        names = json.loads(prompt.split("Trends: ", 1)[1].split("\n", 1)[0])
+        return StubGeminiResponse(json.dumps([{'trend': name, 'description': description} for name in names]))
+
+class StubGenAI:
+    """Stands in for the google.generativeai module."""
+    GenerativeModel = StubGenerativeModel
+
+    def configure(self, **kwargs):
+        pass
+
+def build_tiny_model(path):
+    """A randomly initialised M2M100 model with NLLB's language-code tokens."""
+    from tokenizers import Tokenizer, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast, M2M100Config, M2M100ForConditionalGeneration
+
+    tokenizer = Tokenizer(models.WordPiece(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    trainer = trainers.WordPieceTrainer(
+        vocab_size=500, special_tokens=["<pad>", "</s>", "<unk>", "<s>", "eng_Latn", "urd_Arab"], show_progress=False
+    )
+    tokenizer.train_from_iterator([' '.join(WORDS)] * 10, trainer)
+    fast_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="<pad>", eos_token="</s>", unk_token="<unk>", bos_token="<s>",
+        model_input_names=["input_ids", "attention_mask"]
+    )
+    fast_tokenizer.save_pretrained(path)
+
+    config = M2M100Config(
+        vocab_size=len(fast_tokenizer), d_model=32, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        max_position_embeddings=1024, pad_token_id=0, eos_token_id=1, bos_token_id=3, decoder_start_token_id=1
+    )
+    M2M100ForConditionalGeneration(config).save_pretrained(path)
+
+def start_server(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_async_server():
+    """Serve async_app on its own event loop thread; returns (port, stop)."""
+    from aiohttp import web
+    import async_app
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(async_app.create_app())
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = runner.addresses[0][1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    return port, stop
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def make_story(i):
+    # Numbered sentences, so the translation memory never short-circuits the model
+    return "\n".join(
+        f"Report {i}.{j} says technology is shaping the future of pakistan. "
+        f"Story {i}.{j} is about how this future is shaping technology."
+        for j in range(3)
+    )
+
+def run_level(base_url, endpoint, make_body, concurrency, total):
+    def call(i):
+        start_time = time.perf_counter()
+        response = requests.post(base_url + endpoint, json=make_body(i), timeout=600)
+        elapsed = time.perf_counter() - start_time
+        ok = response.status_code == 200 and response.json().get('success')
+        return elapsed, ok
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(total)))
+    wall_time = time.perf_counter() - start_time
+
+    latencies = sorted(elapsed for elapsed, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return latencies, wall_time, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the app's API")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=48, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--ollama-tokens-per-sec", type=float, default=200)
+    parser.add_argument("--ollama-parallel", type=int, default=2)
+    parser.add_argument("--story-tokens", type=int, default=100)
+    parser.add_argument("--gemini-latency-ms", type=float, default=200)
+    parser.add_argument("--endpoints", default="scrape-trends,generate-story,translate-story")
+    parser.add_argument("--server", default="flask", choices=("flask", "async"),
+                        help="Serve with the threaded Flask server or the aiohttp front end (async_app.py)")
+    parser.add_argument("--show-metrics", action="store_true", help="Print /api/metrics after the run")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",")]
+
+    FakeBackendHandler.tokens_per_sec = args.ollama_tokens_per_sec
+    FakeBackendHandler.story_tokens = args.story_tokens
+    FakeBackendHandler.slots = threading.Semaphore(args.ollama_parallel)
+    StubGenerativeModel.latency = args.gemini_latency_ms / 1000
+
+    workdir = tempfile.mkdtemp(prefix="reelify-bench-")
+    print(f"Work directory {workdir}")
+    print("⏳ Building tiny translation model...")
+    build_tiny_model(os.path.join(workdir, "tiny-nllb"))
+
+    backend = start_server(ThreadingHTTPServer(("127.0.0.1", 0), FakeBackendHandler))
+    backend_url = f"http://127.0.0.1:{backend.server_address[1]}"
+
+    # Everything the app writes (HTML snapshots, SQLite stores) goes to the work directory
+    os.environ.update({
+        'OLLAMA_URL': backend_url,
+        'OLLAMA_MODEL': OLLAMA_MODEL,
+        'OLLAMA_NUM_PARALLEL': str(args.ollama_parallel),
+        'TRANSLATION_MODEL': os.path.join(workdir, "tiny-nllb"),
+        'TREND_HISTORY_DB': os.path.join(workdir, "trend_history.db"),
+        'STORY_CACHE_DB': os.path.join(workdir, "story_cache.db"),
+        'TRANSLATION_MEMORY_DB': os.path.join(workdir, "translation_memory.db"),
+    })
+    os.environ.pop('TRANSLATION_SERVICE', None)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+
+    import app
+    from werkzeug.serving import make_server
+
+    app._genai = StubGenAI()
+    for location, (url, file_name) in list(app.TREND_LOCATIONS.items()):
+        app.TREND_LOCATIONS[location] = (f"{backend_url}/{location}/", file_name)
+    app.story_generator.probe_ollama()
+    app.translator.load_model()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    if args.server == "async":
+        port, stop_server = start_async_server()
+    else:
+        server = start_server(make_server("127.0.0.1", 0, app.app, threaded=True))
+        port, stop_server = server.server_port, server.shutdown
+    base_url = f"http://127.0.0.1:{port}"
+
+    workloads = {
+        'scrape-trends': ('/api/scrape-trends', lambda i: {'location': 'pakistan'}),
+        'generate-story': ('/api/generate-story', lambda i: {
+            'tag': f"#Trend{i}-{time.monotonic_ns()}",
+            'description': "A trending topic used for benchmarking."
+        }),
+        'translate-story': ('/api/translate-story', lambda i: {'text': make_story(f"{i}-{time.monotonic_ns()}")}),
+    }
+
+    if 'scrape-trends' in endpoints:
+        # The first scrape fetches, parses and describes every trend; later ones hit the snapshot
+        start_time = time.perf_counter()
+        requests.post(base_url + '/api/scrape-trends', json={'location': 'pakistan'}, timeout=600)
+        print(f"Cold /api/scrape-trends: {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    print("=" * 96)
+    print(f"{'endpoint':24s} {'conc':>5s} {'reqs':>5s} {'errors':>6s} "
+          f"{'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s} {'req/s':>8s}")
+    print("=" * 96)
+    for name in endpoints:
+        endpoint, make_body = workloads[name]
+        for concurrency in levels:
+            latencies, wall_time, errors = run_level(base_url, endpoint, make_body, concurrency, args.requests)
+            print(f"{endpoint:24s} {concurrency:5d} {len(latencies):5d} {errors:6d} "
+                  f"{percentile(latencies, 0.50) * 1000:9.1f} {percentile(latencies, 0.95) * 1000:9.1f} "
+                  f"{percentile(latencies, 0.99) * 1000:9.1f} {latencies[-1] * 1000:9.1f} "
+                  f"{len(latencies) / wall_time:8.1f}")
+    print("=" * 96)
+
+    if args.show_metrics:
+        print(requests.get(base_url + '/api/metrics', timeout=10).text)
+
+    stop_server()
+    backend.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Trend-card parser benchmark
+
+Parses the checked-in trends24_source.html snapshot with every available
+trend_parser backend, checks that they all return exactly the same
+trend dicts as the BeautifulSoup reference, and prints the timings.
+
+Usage:
+    python benchmark_parser.py [--repeat 20] [--limit 20]
+"""
+
+import argparse
+import time
+
+from trend_parser import parse_trends, lxml_html
+
+FIXTURE = "trends24_source.html"
+
+def time_backend(backend, html_content, limit, repeat):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        _, trends = parse_trends(html_content, backend, limit)
+        timings.append(time.perf_counter() - start_time)
+    timings.sort()
+    return trends, timings[len(timings) // 2], timings[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trend-card parser backends")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(FIXTURE, "r", encoding="utf-8") as file:
+        html_content = file.read()
+
+    backends = ["bs4", "stream"]
+    if lxml_html is not None:
+        backends.append("lxml")
+
+    print(f"Parsing {FIXTURE} ({len(html_content) / 1024:.0f} KB), first {args.limit} items, {args.repeat} runs")
+    print("=" * 60)
+
+    reference = None
+    baseline = None
+    for backend in backends:
+        trends, median, best = time_backend(backend, html_content, args.limit, args.repeat)
+
+        if reference is None:
+            reference, baseline = trends, median
+        elif trends != reference:
+            raise SystemExit(f"❌ {backend} output differs from bs4 reference")
+
+        print(f"{backend:8s} median {median * 1000:8.2f} ms   best {best * 1000:8.2f} ms   "
+              f"{baseline / median:6.1f}x   {len(trends)} trends")
+
+    print("=" * 60)
+    print("✅ All backends returned identical trends")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Translation backend comparison
+
+Translates a fixed set of English stories with each FacebookUrduTranslator
+inference backend and reports load time, translation time, peak memory and
+quality relative to the fp32 PyTorch output (chrF, 0-100). Each backend runs
+in its own process so memory numbers don't mix.
+
+Usage:
+    python benchmark_translation.py [--backends torch,int8,onnx,ctranslate2] [--model facebook/nllb-200-distilled-600M] [--profile quality]
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+from collections import Counter
+
+STORIES = [
+    "Pakistan's cricket team arrived in Lahore this morning after a historic series win. "
+    "Thousands of fans lined the streets to welcome the players home. "
+    "The captain thanked supporters and said the team would now focus on the upcoming World Cup.",
+
+    "Heavy monsoon rains have flooded several neighbourhoods in Karachi. "
+    "Rescue teams are moving families to higher ground, and schools will remain closed on Monday. "
+    "Officials say the drainage system could not cope with the amount of water.",
+
+    "A new technology park opened in Islamabad today, promising thousands of jobs for young graduates. "
+    "The government hopes it will attract foreign investment. "
+    "Critics warn that internet speeds must improve before companies commit to the project.",
+
+    "The State Bank kept interest rates unchanged, citing easing inflation. "
+    "Business leaders welcomed the decision but asked for lower rates later this year. "
+    "Analysts expect the rupee to stay stable over the coming weeks.",
+]
+
+def chrf(hypothesis, reference, max_order=6, beta=2):
+    """Character n-gram F-score in the style of sacreBLEU's chrF (whitespace ignored)."""
+    hypothesis = hypothesis.replace(" ", "")
+    reference = reference.replace(" ", "")
+    precisions, recalls = [], []
+    for order in range(1, max_order + 1):
+        hyp_ngrams = Counter(hypothesis[i:i + order] for i in range(len(hypothesis) - order + 1))
+        ref_ngrams = Counter(reference[i:i + order] for i in range(len(reference) - order + 1))
+        if not hyp_ngrams or not ref_ngrams:
+            continue
+        overlap = sum((hyp_ngrams & ref_ngrams).values())
+        precisions.append(overlap / sum(hyp_ngrams.values()))
+        recalls.append(overlap / sum(ref_ngrams.values()))
+    if not precisions:
+        return 0.0
+    precision = sum(precisions) / len(precisions)
+    recall = sum(recalls) / len(recalls)
+    if precision + recall == 0:
+        return 0.0
+    return 100 * (1 + beta ** 2) * precision * recall / (beta ** 2 * precision + recall)
+
+def run_backend(backend, model_name, cache_dir, profile, results):
+    from translation import FacebookUrduTranslator
+
+    translator = FacebookUrduTranslator(model_name=model_name, backend=backend, cache_dir=cache_dir,
+                                        default_profile=profile)
+    start_time = time.perf_counter()
+    translator.load_model()
+    load_time = time.perf_counter() - start_time
+
+    # One warm-up pass so lazy initialisation doesn't count against the backend
+    translator.translate(STORIES[0])
+
+    translations = []
+    start_time = time.perf_counter()
+    for story in STORIES:
+        translations.append(translator.translate(story))
+    translate_time = time.perf_counter() - start_time
+
+    results.put({
+        'backend': backend,
+        'load_time': load_time,
+        'translate_time': translate_time,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'translations': translations
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare translation inference backends")
+    parser.add_argument("--backends", default="torch,int8,onnx,ctranslate2")
+    parser.add_argument("--model", default="facebook/nllb-200-distilled-600M")
+    parser.add_argument("--cache-dir", default="model_cache")
+    parser.add_argument("--profile", default="quality", help="Decoding profile: fast, balanced or quality")
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(",")]
+    if "torch" not in backends:
+        # fp32 PyTorch output is the quality reference
+        backends.insert(0, "torch")
+
+    context = multiprocessing.get_context("spawn")
+    reports = {}
+    for backend in backends:
+        print(f"⏳ Running {backend}...")
+        results = context.Queue()
+        process = context.Process(target=run_backend, args=(backend, args.model, args.cache_dir, args.profile, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0 or results.empty():
+            print(f"❌ {backend} failed (exit code {process.exitcode})")
+            continue
+        reports[backend] = results.get()
+
+    if "torch" not in reports:
+        raise SystemExit("❌ The torch reference backend failed")
+
+    reference = reports["torch"]
+    total_chars = sum(len(story) for story in STORIES)
+    print("\n" + "=" * 80)
+    print(f"{len(STORIES)} stories, {total_chars} characters, model {args.model}, {args.profile} profile")
+    print("=" * 80)
+    print(f"{'backend':12s} {'load s':>8s} {'translate s':>12s} {'speedup':>8s} {'peak MB':>9s} {'chrF vs fp32':>13s}")
+    for backend, report in reports.items():
+        score = sum(
+            chrf(hypothesis, reference_text)
+            for hypothesis, reference_text in zip(report['translations'], reference['translations'])
+        ) / len(STORIES)
+        print(f"{backend:12s} {report['load_time']:8.1f} {report['translate_time']:12.2f} "
+              f"{reference['translate_time'] / report['translate_time']:7.1f}x "
+              f"{report['peak_rss_mb']:9.0f} {score:13.1f}")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
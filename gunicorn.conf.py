@@ -0,0 +1,9 @@
+"""
+gunicorn settings, picked up from the working directory by `gunicorn app:app`
+"""
+
+def post_worker_init(worker):
+    # Start the Ollama status monitor, trend refresher and PRELOAD_MODELS
+    # when each worker boots rather than on its first request
+    from app import start_background_workers
+    start_background_workers()
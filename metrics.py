@@ -0,0 +1,221 @@
+"""
+Prometheus-format metrics for Reelify
+
+A small in-process registry of counters, gauges and histograms, rendered in
+the Prometheus text exposition format by /api/metrics. It has no
+dependencies, so the translation service process can use it as well.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers everything from a cached parse to a long story generation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.label_names, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+    def samples(self):
+        """(suffix, label string, value) for every sample, or [] if there's nothing to report yet."""
+        with self._lock:
+            return [("", self._labels(key), value) for key, value in sorted(self._values.items())]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def values(self):
+        """{label values tuple: count}"""
+        with self._lock:
+            return dict(self._values)
+
+class Gauge(Metric):
+    """A gauge that is either set directly or read from a function at render time.
+
+    The function returns a number, a {label values tuple: number} dict for
+    labelled gauges, or None when there is nothing to report.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=(), function=None):
+        super().__init__(name, documentation, labels)
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        self.function = function
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        if self.function is None:
+            return super().samples()
+        try:
+            value = self.function()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [("", self._labels(key), item) for key, item in sorted(value.items()) if item is not None]
+        return [("", "", value)]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block, even if it raises."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    samples.append(("_bucket", self._labels(key, [("le", format_value(float(bound)))]), cumulative))
+                samples.append(("_bucket", self._labels(key, [("le", "+Inf")]), state['count']))
+                samples.append(("_sum", self._labels(key), state['sum']))
+                samples.append(("_count", self._labels(key), state['count']))
+        return samples
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=(), function=None):
+        return self.register(Gauge(name, documentation, labels, function))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Text exposition format. Metrics without samples are left out."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+def hit_ratio(lookups):
+    """Gauge function: hits / lookups, from a counter with a "result" label of "hit" or "miss".
+
+    Ratios are grouped by the counter's other labels; a counter labelled only
+    by result gives a single unlabelled ratio.
+    """
+    result_index = lookups.label_names.index("result")
+
+    def ratio():
+        totals = {}
+        for key, count in lookups.values().items():
+            group = key[:result_index] + key[result_index + 1:]
+            hits, total = totals.get(group, (0, 0))
+            totals[group] = (hits + (count if key[result_index] == "hit" else 0), total + count)
+        ratios = {group: hits / total for group, (hits, total) in totals.items() if total}
+        if len(lookups.label_names) == 1:
+            return ratios.get(())
+        return ratios
+    return ratio
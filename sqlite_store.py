@@ -0,0 +1,31 @@
+"""
+Lazily created SQLite stores
+
+The trend history, story cache, session store and translation memory each
+keep their data in one SQLite file. The file and its schema are created by
+the first query rather than by the constructor, so importing the app from a
+benchmark or a tool leaves no databases behind.
+"""
+
+import sqlite3
+import threading
+
+class SQLiteStore:
+    """A store in one SQLite file (in WAL mode); subclasses create their tables in create_schema."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def create_schema(self, conn):
+        raise NotImplementedError
+
+    def _connect(self):
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    with sqlite3.connect(self.db_path, timeout=10) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        self.create_schema(conn)
+                    self._schema_ready = True
+        return sqlite3.connect(self.db_path, timeout=10)
@@ -1,6 +1,8 @@
 import requests
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 class LlamaStoryGenerator:
     def __init__(self, model_name="llama3.1:8b", base_url="http://localhost:11434"):
@@ -224,23 +226,25 @@ def main():
             print(f"💾 Story saved to {filename}")
         
     elif choice == "3":
-        # Generate all stories
+        # Generate all stories, as many at once as Ollama serves in parallel
+        # (match OLLAMA_NUM_PARALLEL on the server)
+        workers = int(os.environ.get("OLLAMA_NUM_PARALLEL", "2"))
         all_results = []
-        for i, topic in enumerate(trending_topics, 1):
-            print(f"\n📰 Processing {i}/{len(trending_topics)}: {topic['tag']}")
-            result = generator.generate_story(
+        
+        def generate(topic):
+            return topic, generator.generate_story(
                 tag=topic["tag"],
                 description=topic["description"]
             )
-            if result:
-                all_results.append(result)
-                print(f"✅ Generated story for {topic['tag']} ({result['generation_time']:.1f}s)")
-            else:
-                print(f"❌ Failed to generate story for {topic['tag']}")
-            
-            # Small delay between requests
-            if i < len(trending_topics):
-                time.sleep(2)
+        
+        print(f"\n📰 Processing {len(trending_topics)} topics with {workers} parallel workers")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for topic, result in executor.map(generate, trending_topics):
+                if result:
+                    all_results.append(result)
+                    print(f"✅ Generated story for {topic['tag']} ({result['generation_time']:.1f}s)")
+                else:
+                    print(f"❌ Failed to generate story for {topic['tag']}")
         
         # Save all results
         if all_results:
@@ -0,0 +1,758 @@
+"""
+English to Urdu translation for Reelify
+
+The NLLB translator itself plus the pieces that make it cheap to serve:
+a cross-request micro-batching scheduler, a persistent sentence-level
+translation memory, and a client for the shared translation service
+(see translation_service.py).
+
+torch and transformers are only imported when a model is actually loaded,
+so importing this module (and the app) stays cheap.
+"""
+
+import os
+import re
+import time
+import json
+import queue
+import hashlib
+import secrets
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Client
+
+import metrics
+from sqlite_store import SQLiteStore
+
+# Whitespace after ., ! or ?, optionally followed by a closing quote or bracket
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\')\]])\s+')
+
+TRANSLATION_BACKENDS = ("torch", "int8", "onnx", "ctranslate2")
+
+# Decoding profiles, cheapest first. The output length limit scales with the
+# longest source chunk of a batch: tokens * length_ratio + length_margin,
+# capped at MAX_OUTPUT_TOKENS.
+DECODING_PROFILES = {
+    "fast": {'num_beams': 1, 'length_ratio': 1.5, 'length_margin': 10},
+    "balanced": {'num_beams': 2, 'length_ratio': 2.0, 'length_margin': 16},
+    "quality": {'num_beams': 4, 'length_ratio': 2.5, 'length_margin': 32},
+}
+MAX_OUTPUT_TOKENS = 512
+# Typical Urdu output tokens per English source token, for latency estimates
+EXPECTED_OUTPUT_RATIO = 1.3
+
+TRANSLATION_BATCH_SECONDS = metrics.histogram(
+    "reelify_translation_batch_seconds", "Time of each batched generate call", ["profile"]
+)
+TRANSLATION_CHUNK_SECONDS = metrics.histogram(
+    "reelify_translation_chunk_seconds", "Time from queueing a chunk to its translation, including batching waits",
+    ["profile"]
+)
+TRANSLATION_OUTPUT_TOKENS = metrics.counter(
+    "reelify_translation_output_tokens_total", "Tokens generated by the translator", ["profile"]
+)
+TRANSLATOR_TOKENS_PER_SECOND = metrics.gauge(
+    "reelify_translator_tokens_per_second", "Moving average of translator output tokens/sec, summed over a batch", ["profile"]
+)
+TRANSLATION_MEMORY_LOOKUPS = metrics.counter(
+    "reelify_translation_memory_lookups_total", "Sentences looked up in the translation memory", ["result"]
+)
+TRANSLATION_MEMORY_HIT_RATIO = metrics.gauge(
+    "reelify_translation_memory_hit_ratio", "Share of sentences answered from the translation memory",
+    function=metrics.hit_ratio(TRANSLATION_MEMORY_LOOKUPS)
+)
+TRANSLATION_QUEUE_DEPTH = metrics.gauge(
+    "reelify_translation_queue_depth", "Chunks waiting for the translation scheduler"
+)
+
+def moving_average(previous, value):
+    """Exponential moving average, so rate estimates follow load changes."""
+    return value if previous is None else 0.7 * previous + 0.3 * value
+
+class FacebookUrduTranslator:
+    def __init__(self, model_name="facebook/nllb-200-distilled-600M", max_chunk_tokens=200, max_batch_size=16,
+                 backend="torch", cache_dir="model_cache", default_profile="quality"):
+        self.tokenizer = None
+        self.model = None
+        self.model_name = model_name
+        # Inference backend: "torch" (fp32), "int8" (dynamically quantized
+        # torch), "onnx" (ONNX Runtime) or "ctranslate2" (int8). Converted
+        # models are kept under `cache_dir` so conversion happens once.
+        if backend not in TRANSLATION_BACKENDS:
+            raise ValueError(f"Unknown translation backend '{backend}'")
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.src_lang = "eng_Latn"
+        self.tgt_lang = "urd_Arab"
+        self.is_loaded = False
+        self.is_loading = False
+        self.load_error = None
+        # Sentences are packed into chunks of up to `max_chunk_tokens` source
+        # tokens, and up to `max_batch_size` chunks share one generate call
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_batch_size = max_batch_size
+        self._load_lock = threading.Lock()
+        # Fast tokenizers switch truncation/padding state on every call, so
+        # concurrent calls from request threads and the scheduler must not overlap
+        self._tokenizer_lock = threading.Lock()
+        # Optional TranslationScheduler that batches chunks across requests
+        self.scheduler = None
+        # Optional TranslationMemory of already translated sentences
+        self.memory = None
+        # Profile used when a request names neither a profile nor a latency
+        # budget, and per profile the measured output tokens/sec of whole
+        # batches (reported as a metric) and of a single sequence (used to
+        # predict one request's latency)
+        self.default_profile = self.resolve_profile(default_profile)
+        self.throughput = {}
+        self.decode_rate = {}
+        self._throughput_lock = threading.Lock()
+        
+    def load_model(self):
+        """Load the translation model (lazy loading)"""
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            self.is_loading = True
+            try:
+                from transformers import AutoTokenizer
+                print(f"Loading translation model ({self.backend})... This may take a few minutes on first run.")
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                self.model = self._load_backend_model()
+                self.tokenizer.src_lang = self.src_lang
+                self.lang_code_to_id = {
+                    "eng_Latn": self.tokenizer.convert_tokens_to_ids("eng_Latn"),
+                    "urd_Arab": self.tokenizer.convert_tokens_to_ids("urd_Arab"),
+                }
+                self.is_loaded = True
+                self.load_error = None
+                print("Translation model loaded successfully!")
+            except Exception as e:
+                self.load_error = str(e)
+                print(f"Error loading translation model: {e}")
+                raise e
+            finally:
+                self.is_loading = False
+    
+    def readiness(self):
+        """Load state for health checks: not_loaded, loading, ready or failed."""
+        if self.is_loaded:
+            state = "ready"
+        elif self.is_loading:
+            state = "loading"
+        elif self.load_error:
+            state = "failed"
+        else:
+            state = "not_loaded"
+        return {'state': state, 'backend': self.backend, 'model_name': self.model_name, 'error': self.load_error}
+
+    def converted_model_path(self, suffix):
+        name = self.model_name.strip("/").replace("/", "--")
+        return os.path.join(self.cache_dir, f"{name}-{suffix}")
+    
+    def _load_backend_model(self):
+        if self.backend in ("torch", "int8"):
+            import torch
+            from transformers import AutoModelForSeq2SeqLM
+        
+        if self.backend == "torch":
+            return AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+        
+        if self.backend == "int8":
+            # Quantizing the Linear layers takes seconds, so it is redone at load
+            model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        
+        if self.backend == "onnx":
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            path = self.converted_model_path("onnx")
+            if not os.path.isdir(path):
+                print(f"Exporting {self.model_name} to ONNX in {path}...")
+                model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True)
+                model.save_pretrained(path)
+                return model
+            return ORTModelForSeq2SeqLM.from_pretrained(path)
+        
+        import ctranslate2
+        path = self.converted_model_path("ct2-int8")
+        if not os.path.isdir(path):
+            print(f"Converting {self.model_name} to CTranslate2 in {path}...")
+            converter = ctranslate2.converters.TransformersConverter(self.model_name)
+            converter.convert(path, quantization="int8")
+        return ctranslate2.Translator(path, device="cpu", compute_type="int8")
+    
+    def split_sentences(self, text):
+        """Split text into paragraphs (one per line) of sentences.
+        
+        Blank lines stay as empty paragraphs, so the translation keeps the
+        source's layout.
+        """
+        return [
+            [sentence for sentence in SENTENCE_BOUNDARY.split(line.strip()) if sentence]
+            for line in text.splitlines()
+        ]
+    
+    def count_tokens(self, texts):
+        if not texts:
+            return []
+        with self._tokenizer_lock:
+            return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    
+    def pack_chunks(self, sentences):
+        """Pack consecutive sentences into chunks of at most `max_chunk_tokens`.
+        
+        A single sentence longer than the budget is split between words.
+        """
+        token_counts = self.count_tokens(sentences)
+        chunks = []
+        current, current_tokens = [], 0
+        for sentence, token_count in zip(sentences, token_counts):
+            if token_count > self.max_chunk_tokens:
+                if current:
+                    chunks.append(' '.join(current))
+                    current, current_tokens = [], 0
+                chunks.extend(self._split_long_sentence(sentence))
+                continue
+            if current and current_tokens + token_count > self.max_chunk_tokens:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += token_count
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+    
+    def _split_long_sentence(self, sentence):
+        words = sentence.split()
+        token_counts = self.count_tokens(words)
+        pieces = []
+        current, current_tokens = [], 0
+        for word, token_count in zip(words, token_counts):
+            if current and current_tokens + token_count > self.max_chunk_tokens:
+                pieces.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += token_count
+        if current:
+            pieces.append(' '.join(current))
+        return pieces
+    
+    def resolve_profile(self, profile):
+        if profile is None:
+            return self.default_profile
+        if profile not in DECODING_PROFILES:
+            raise ValueError(f"Unknown decoding profile '{profile}'")
+        return profile
+    
+    def output_length_limit(self, source_tokens, profile):
+        settings = DECODING_PROFILES[profile]
+        return min(MAX_OUTPUT_TOKENS, int(source_tokens * settings['length_ratio']) + settings['length_margin'])
+    
+    def record_batch(self, profile, output_tokens, longest_output, seconds):
+        """Record one batch: all its output tokens, and the length of its longest sequence.
+        
+        Sequences in a batch decode side by side, so with the scheduler
+        packing several requests into one batch the aggregate rate overstates
+        how fast any one request's translation comes back.
+        """
+        TRANSLATION_BATCH_SECONDS.observe(seconds, profile=profile)
+        TRANSLATION_OUTPUT_TOKENS.inc(output_tokens, profile=profile)
+        if seconds <= 0 or output_tokens <= 0:
+            return
+        with self._throughput_lock:
+            self.throughput[profile] = moving_average(self.throughput.get(profile), output_tokens / seconds)
+            self.decode_rate[profile] = moving_average(self.decode_rate.get(profile), longest_output / seconds)
+            TRANSLATOR_TOKENS_PER_SECOND.set(self.throughput[profile], profile=profile)
+    
+    def estimated_decode_rate(self, profile):
+        """Measured tokens/sec of one sequence for `profile`, else scaled from another profile by beam width."""
+        with self._throughput_lock:
+            measured = dict(self.decode_rate)
+        if profile in measured:
+            return measured[profile]
+        for name, rate in measured.items():
+            return rate * DECODING_PROFILES[name]['num_beams'] / DECODING_PROFILES[profile]['num_beams']
+        return None
+    
+    def choose_profile(self, source_tokens, latency_budget_ms):
+        """The best profile expected to translate `source_tokens` within the budget.
+        
+        Falls back to "fast" when nothing fits or nothing has been measured yet.
+        """
+        expected_tokens = source_tokens * EXPECTED_OUTPUT_RATIO
+        for profile in reversed(list(DECODING_PROFILES)):
+            rate = self.estimated_decode_rate(profile)
+            if rate is not None and expected_tokens / rate * 1000 <= latency_budget_ms:
+                return profile
+        return "fast"
+    
+    def pick_profile(self, text, profile=None, latency_budget_ms=None):
+        """The profile a request gets: the one it named, one that fits its budget, or the default."""
+        if profile is not None or latency_budget_ms is None:
+            return self.resolve_profile(profile)
+        if not self.is_loaded:
+            self.load_model()
+        source_tokens = self.count_tokens([text])[0]
+        return self.choose_profile(source_tokens, latency_budget_ms)
+    
+    def translate_batch(self, chunks, profile=None):
+        """Translate a list of chunks with padded, batched `generate` calls."""
+        if not self.is_loaded:
+            self.load_model()
+        if self.tgt_lang not in self.lang_code_to_id:
+            raise ValueError(f"Target language '{self.tgt_lang}' is not supported.")
+        profile = self.resolve_profile(profile)
+        
+        if self.backend == "ctranslate2":
+            return self._translate_batch_ct2(chunks, profile)
+        
+        import torch
+        forced_bos_token_id = self.lang_code_to_id[self.tgt_lang]
+        num_beams = DECODING_PROFILES[profile]['num_beams']
+        translations = []
+        for start in range(0, len(chunks), self.max_batch_size):
+            batch = chunks[start:start + self.max_batch_size]
+            with self._tokenizer_lock:
+                inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
+            source_tokens = int(inputs["attention_mask"].sum(dim=1).max())
+            start_time = time.perf_counter()
+            with torch.inference_mode():
+                generated_tokens = self.model.generate(
+                    **inputs,
+                    forced_bos_token_id=forced_bos_token_id,
+                    max_length=self.output_length_limit(source_tokens, profile),
+                    num_beams=num_beams,
+                    early_stopping=num_beams > 1
+                )
+            output_lengths = generated_tokens.ne(self.tokenizer.pad_token_id).sum(dim=1)
+            self.record_batch(
+                profile,
+                int(output_lengths.sum()),
+                int(output_lengths.max()),
+                time.perf_counter() - start_time
+            )
+            translations.extend(self.tokenizer.batch_decode(generated_tokens, skip_special_tokens=True))
+        return translations
+    
+    def _translate_batch_ct2(self, chunks, profile):
+        # CTranslate2 works on token strings; the target language is forced
+        # through the target prefix and stripped from the output
+        with self._tokenizer_lock:
+            source = [
+                self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(chunk, truncation=True, max_length=512))
+                for chunk in chunks
+            ]
+        start_time = time.perf_counter()
+        results = self.model.translate_batch(
+            source,
+            target_prefix=[[self.tgt_lang]] * len(source),
+            max_batch_size=self.max_batch_size,
+            beam_size=DECODING_PROFILES[profile]['num_beams'],
+            max_decoding_length=self.output_length_limit(max(len(tokens) for tokens in source), profile)
+        )
+        output_lengths = [len(result.hypotheses[0]) for result in results]
+        self.record_batch(profile, sum(output_lengths), max(output_lengths), time.perf_counter() - start_time)
+        return [
+            self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(result.hypotheses[0][1:]), skip_special_tokens=True)
+            for result in results
+        ]
+    
+    def translate_chunks(self, chunks, profile=None):
+        """Translate chunks, through the shared scheduler when there is one."""
+        if self.scheduler is None:
+            return self.translate_batch(chunks, profile)
+        return [future.result() for future in self.scheduler.submit(chunks, profile)]
+    
+    def decoding_signature(self, profile=None):
+        """Everything besides the source text that determines a translation."""
+        profile = self.resolve_profile(profile)
+        settings = DECODING_PROFILES[profile]
+        return [
+            self.model_name, self.backend, self.src_lang, self.tgt_lang, f"profile={profile}",
+            f"beams={settings['num_beams']}",
+            f"max_length={settings['length_ratio']}x+{settings['length_margin']}<={MAX_OUTPUT_TOKENS}"
+        ]
+    
+    def memory_key(self, sentence, profile=None):
+        normalized = ' '.join(sentence.split())
+        return hashlib.sha256(json.dumps(self.decoding_signature(profile) + [normalized]).encode("utf-8")).hexdigest()
+    
+    def start_sentences(self, sentences, profile=None):
+        """Start translating sentences and return a function that returns the translations.
+        
+        Sentences found in the translation memory, under this profile or a
+        better one, are never re-translated. With a scheduler the rest are
+        queued right away; without one the work happens when the returned
+        function is called.
+        """
+        profile = self.resolve_profile(profile)
+        translations = [None] * len(sentences)
+        keys = []
+        if self.memory is not None:
+            profiles = list(DECODING_PROFILES)
+            usable = profiles[profiles.index(profile):]
+            candidates = {name: [self.memory_key(sentence, name) for sentence in sentences] for name in usable}
+            known = self.memory.get_many([key for name in usable for key in candidates[name]])
+            for i in range(len(sentences)):
+                translations[i] = next(
+                    (known[candidates[name][i]] for name in usable if candidates[name][i] in known), None
+                )
+            keys = candidates[profile]
+        missing = [i for i in range(len(sentences)) if translations[i] is None]
+        if self.memory is not None:
+            TRANSLATION_MEMORY_LOOKUPS.inc(len(sentences) - len(missing), result="hit")
+            TRANSLATION_MEMORY_LOOKUPS.inc(len(missing), result="miss")
+        # Over-long sentences are split like in pack_chunks and rejoined afterwards
+        pieces = [self.pack_chunks([sentences[i]]) for i in missing]
+        chunks = [chunk for sentence_pieces in pieces for chunk in sentence_pieces]
+        futures = self.scheduler.submit(chunks, profile) if self.scheduler is not None and chunks else None
+        
+        def finish():
+            if futures is not None:
+                results = iter([future.result() for future in futures])
+            else:
+                results = iter(self.translate_batch(chunks, profile) if chunks else [])
+            learned = {}
+            for i, sentence_pieces in zip(missing, pieces):
+                translations[i] = ' '.join(next(results) for _ in sentence_pieces)
+                if keys:
+                    learned[keys[i]] = translations[i]
+            if learned:
+                self.memory.put_many(learned)
+            return list(translations)
+        
+        return finish
+    
+    def translate_stream(self, text, profile=None, latency_budget_ms=None):
+        """Yield each source sentence's translation, in order, as soon as it's decoded.
+        
+        Sentences are translated in groups of 1, 2, 4, ... up to `max_batch_size`,
+        so the first sentence comes back after a single-sentence generate while
+        the later groups still get batched. With a scheduler, the next group is
+        queued before the current one is yielded, keeping the model busy.
+        """
+        if not self.is_loaded:
+            self.load_model()
+        profile = self.pick_profile(text, profile, latency_budget_ms)
+        
+        units = [
+            (paragraph, sentence)
+            for paragraph, sentences in enumerate(self.split_sentences(text))
+            for sentence in sentences
+        ]
+        
+        groups = []
+        start, size = 0, 1
+        while start < len(units):
+            groups.append(units[start:start + size])
+            start += size
+            size = min(size * 2, self.max_batch_size)
+        
+        index = 0
+        pending = self.start_sentences([sentence for _, sentence in groups[0]], profile) if groups else None
+        for group_index, group in enumerate(groups):
+            translations = pending()
+            if group_index + 1 < len(groups):
+                pending = self.start_sentences([sentence for _, sentence in groups[group_index + 1]], profile)
+            
+            for (paragraph, sentence), translation in zip(group, translations):
+                yield {
+                    'index': index,
+                    'paragraph': paragraph,
+                    'source': sentence,
+                    'translation': translation
+                }
+                index += 1
+    
+    def translate(self, text, profile=None, latency_budget_ms=None):
+        """Translate English text to Urdu"""
+        if not self.is_loaded:
+            self.load_model()
+            
+        try:
+            profile = self.pick_profile(text, profile, latency_budget_ms)
+            if self.memory is not None:
+                # Sentence by sentence, so unchanged sentences come from memory
+                paragraphs = self.split_sentences(text)
+                translated = iter(self.start_sentences(
+                    [sentence for sentences in paragraphs for sentence in sentences], profile
+                )())
+                return '\n'.join(
+                    ' '.join(next(translated) for _ in sentences)
+                    for sentences in paragraphs
+                )
+            
+            # Chunk on sentence boundaries within each paragraph, then translate
+            # every chunk of the text in one batch
+            paragraphs = [self.pack_chunks(sentences) for sentences in self.split_sentences(text)]
+            translated = iter(self.translate_chunks([chunk for chunks in paragraphs for chunk in chunks], profile))
+            
+            return '\n'.join(
+                ' '.join(next(translated) for _ in chunks)
+                for chunks in paragraphs
+            )
+        except Exception as e:
+            print(f"Translation error: {e}")
+            raise e
+
+class TranslationScheduler:
+    """Micro-batches translation chunks from all in-flight requests.
+    
+    A single worker thread owns the model. It waits up to `max_wait_ms` after
+    the first queued chunk (or until `max_batch_size` chunks are queued),
+    sorts what it collected by length to keep padding low, runs batched
+    generate calls and resolves each chunk's future. Chunks only share a
+    batch with chunks of the same decoding profile.
+    """
+    def __init__(self, translator, max_batch_size=16, max_wait_ms=10):
+        self.translator = translator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        TRANSLATION_QUEUE_DEPTH.set_function(self.queue_depth)
+    
+    def submit(self, chunks, profile=None):
+        self._ensure_worker()
+        profile = self.translator.resolve_profile(profile)
+        futures = []
+        for chunk in chunks:
+            future = Future()
+            queued_at = time.perf_counter()
+            future.add_done_callback(
+                lambda _, profile=profile, queued_at=queued_at:
+                    TRANSLATION_CHUNK_SECONDS.observe(time.perf_counter() - queued_at, profile=profile)
+            )
+            self._queue.put((chunk, profile, future))
+            futures.append(future)
+        return futures
+    
+    def queue_depth(self):
+        return self._queue.qsize()
+    
+    def _ensure_worker(self):
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="translation-scheduler", daemon=True)
+                self._worker.start()
+    
+    def _collect(self):
+        pending = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Take whatever else is already waiting, so it can be grouped by length too
+        while len(pending) < self.max_batch_size * 4:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+    
+    def _run(self):
+        while True:
+            pending = self._collect()
+            by_profile = {}
+            for chunk, profile, future in pending:
+                by_profile.setdefault(profile, []).append((chunk, future))
+            for profile, items in by_profile.items():
+                items.sort(key=lambda item: len(item[0]))
+                for start in range(0, len(items), self.max_batch_size):
+                    batch = items[start:start + self.max_batch_size]
+                    try:
+                        translations = self.translator.translate_batch([chunk for chunk, _ in batch], profile)
+                    except Exception as e:
+                        for _, future in batch:
+                            future.set_exception(e)
+                        continue
+                    for (_, future), translation in zip(batch, translations):
+                        future.set_result(translation)
+
+class TranslationMemory(SQLiteStore):
+    """Persistent sentence-level translation memory with LRU eviction.
+    
+    Keys come from FacebookUrduTranslator.memory_key, so a change of model,
+    backend or decoding settings never returns a stale translation.
+    """
+    def __init__(self, db_path="translation_memory.db", max_entries=100000):
+        super().__init__(db_path)
+        self.max_entries = max_entries
+        self._writes = 0
+    
+    def create_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS translation_memory_last_used ON translation_memory (last_used)")
+    
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        with self._connect() as conn:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, translation FROM translation_memory WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+                conn.execute(
+                    f"UPDATE translation_memory SET last_used = ? WHERE key IN ({placeholders})", [now] + batch
+                )
+        return found
+    
+    def put_many(self, translations):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translation_memory (key, translation, last_used) VALUES (?, ?, ?)",
+                [(key, translation, now) for key, translation in translations.items()]
+            )
+            # Trimming scans the index, so only do it every so often
+            self._writes += len(translations)
+            if self._writes >= 1000:
+                self._writes = 0
+                conn.execute("""
+                    DELETE FROM translation_memory WHERE key IN (
+                        SELECT key FROM translation_memory ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+
+def parse_service_address(address):
+    """"host:port" for TCP, anything else is a Unix socket path."""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit() and "/" not in address:
+        return (host, int(port)), "AF_INET"
+    return address, "AF_UNIX"
+
+def service_key_path(address):
+    return f"{address}.key"
+
+def write_service_key(address):
+    """Create a random key for a Unix socket service, readable only by its user."""
+    authkey = secrets.token_hex(32).encode()
+    path = service_key_path(address)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as file:
+        os.fchmod(file.fileno(), 0o600)
+        file.write(authkey)
+    return authkey
+
+def check_service_key(family, authkey):
+    # Connections unpickle whatever they receive, so a reachable port without a secret key is remote code execution
+    if family == "AF_INET" and not authkey:
+        raise ValueError("A TCP translation service needs TRANSLATION_SERVICE_KEY to be set")
+
+class RemoteTranslator:
+    """Client for translation_service.py with the same interface the app uses.
+    
+    Web workers share the one model loaded in the service process instead of
+    each loading their own copy. Connections are kept open and reused.
+    
+    Without `authkey`, a Unix socket service's key is read from the file it
+    writes next to the socket; TCP services always need an explicit key.
+    """
+    def __init__(self, address, authkey=None):
+        self.address, self.family = parse_service_address(address)
+        check_service_key(self.family, authkey)
+        self.authkey = authkey
+        self._idle = queue.LifoQueue()
+    
+    def _connect(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            authkey = self.authkey
+            if authkey is None:
+                # Read on every new connection; the service writes a new key each time it starts
+                with open(service_key_path(self.address), "rb") as file:
+                    authkey = file.read()
+            return Client(self.address, family=self.family, authkey=authkey)
+    
+    def _exchange(self, message):
+        """Send one request and yield replies until the service says it's done."""
+        for attempt in range(2):
+            conn = self._connect()
+            finished = False
+            try:
+                try:
+                    conn.send(message)
+                    reply = conn.recv()
+                except (EOFError, OSError):
+                    # Stale pooled connection (e.g. the service restarted); retry on a fresh one
+                    conn.close()
+                    if attempt:
+                        raise
+                    continue
+                while True:
+                    if not reply.get('ok'):
+                        finished = True
+                        raise RuntimeError(reply.get('error', 'Translation service error'))
+                    if 'item' not in reply:
+                        finished = True
+                        yield reply
+                        return
+                    yield reply
+                    reply = conn.recv()
+            finally:
+                if finished:
+                    self._idle.put(conn)
+                else:
+                    # Abandoned mid-stream: unread replies make the connection unusable
+                    conn.close()
+    
+    def _call(self, message):
+        for reply in self._exchange(message):
+            return reply
+    
+    @property
+    def is_loaded(self):
+        try:
+            return self._call({'op': 'status'})['loaded']
+        except Exception:
+            return False
+    
+    def readiness(self):
+        try:
+            status = self._call({'op': 'status'})
+        except Exception as e:
+            return {'state': 'unavailable', 'remote': True, 'error': str(e)}
+        readiness = status.get('readiness') or {'state': 'ready' if status['loaded'] else 'not_loaded'}
+        return dict(readiness, remote=True)
+    
+    def load_model(self):
+        self._call({'op': 'load'})
+    
+    def metrics_text(self):
+        """The service's own translation metrics, in Prometheus text format."""
+        return self._call({'op': 'metrics'})['result']
+    
+    def pick_profile(self, text, profile=None, latency_budget_ms=None):
+        return self._call({
+            'op': 'pick_profile', 'text': text, 'profile': profile, 'latency_budget_ms': latency_budget_ms
+        })['result']
+    
+    def translate(self, text, profile=None, latency_budget_ms=None):
+        return self._call({
+            'op': 'translate', 'text': text, 'profile': profile, 'latency_budget_ms': latency_budget_ms
+        })['result']
+    
+    def translate_stream(self, text, profile=None, latency_budget_ms=None):
+        message = {'op': 'translate_stream', 'text': text, 'profile': profile, 'latency_budget_ms': latency_budget_ms}
+        for reply in self._exchange(message):
+            if 'item' in reply:
+                yield reply['item']
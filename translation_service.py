@@ -0,0 +1,150 @@
+"""
+Shared translation service
+
+Loads the NLLB translator once, in a dedicated process with its own torch
+thread settings (optionally pinned to a set of CPU cores), and serves every
+web worker over a local socket. Point the app at it with
+TRANSLATION_SERVICE=<address>; memory then stays constant as web workers are
+added, and requests from all of them are micro-batched together.
+
+Usage:
+    python translation_service.py [--address /tmp/reelify-translation.sock] [--cores 0-3] [--threads 4] [--preload]
+"""
+
+import argparse
+import os
+import threading
+import traceback
+from multiprocessing.connection import Listener
+
+import torch
+
+import metrics
+from translation import (
+    FacebookUrduTranslator, TranslationScheduler, TranslationMemory, TRANSLATION_BACKENDS, DECODING_PROFILES,
+    parse_service_address, write_service_key, check_service_key
+)
+
+def parse_cores(spec):
+    """"0-3,6" -> {0, 1, 2, 3, 6}"""
+    cores = set()
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        cores.update(range(int(start), int(end or start) + 1))
+    return cores
+
+def handle_connection(conn, translator):
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            try:
+                op = message.get('op')
+                if op == 'status':
+                    conn.send({
+                        'ok': True,
+                        'loaded': translator.is_loaded,
+                        'model_name': translator.model_name,
+                        'backend': translator.backend,
+                        'readiness': translator.readiness()
+                    })
+                elif op == 'load':
+                    translator.load_model()
+                    conn.send({'ok': True})
+                elif op == 'metrics':
+                    conn.send({'ok': True, 'result': metrics.REGISTRY.render()})
+                elif op == 'pick_profile':
+                    profile = translator.pick_profile(
+                        message['text'], message.get('profile'), message.get('latency_budget_ms')
+                    )
+                    conn.send({'ok': True, 'result': profile})
+                elif op == 'translate':
+                    translation = translator.translate(
+                        message['text'], message.get('profile'), message.get('latency_budget_ms')
+                    )
+                    conn.send({'ok': True, 'result': translation})
+                elif op == 'translate_stream':
+                    items = translator.translate_stream(
+                        message['text'], message.get('profile'), message.get('latency_budget_ms')
+                    )
+                    for item in items:
+                        conn.send({'ok': True, 'item': item})
+                    conn.send({'ok': True, 'done': True})
+                else:
+                    conn.send({'ok': False, 'error': f"Unknown operation '{op}'"})
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                traceback.print_exc()
+                try:
+                    conn.send({'ok': False, 'error': str(e)})
+                except (EOFError, OSError):
+                    return
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared English to Urdu translation service")
+    parser.add_argument("--address", default=os.environ.get("TRANSLATION_SERVICE", "/tmp/reelify-translation.sock"),
+                        help="Unix socket path or host:port")
+    parser.add_argument("--cores", help="CPU cores to pin the service to, e.g. 0-3 or 0,2,4")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads (default: one per usable core)")
+    parser.add_argument("--model", default=os.environ.get("TRANSLATION_MODEL", "facebook/nllb-200-distilled-600M"))
+    parser.add_argument("--backend", default=os.environ.get("TRANSLATION_BACKEND", "torch"), choices=TRANSLATION_BACKENDS)
+    parser.add_argument("--profile", default=os.environ.get("TRANSLATION_PROFILE", "quality"), choices=DECODING_PROFILES,
+                        help="Decoding profile for requests that name neither a profile nor a latency budget")
+    parser.add_argument("--cache-dir", default=os.environ.get("TRANSLATION_MODEL_CACHE", "model_cache"))
+    parser.add_argument("--max-batch", type=int, default=int(os.environ.get("TRANSLATION_MAX_BATCH", "16")))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.environ.get("TRANSLATION_MAX_WAIT_MS", "10")))
+    parser.add_argument("--memory-db", default=os.environ.get("TRANSLATION_MEMORY_DB", "translation_memory.db"))
+    parser.add_argument("--memory-size", type=int, default=int(os.environ.get("TRANSLATION_MEMORY_SIZE", "100000")),
+                        help="Sentences kept in the translation memory")
+    parser.add_argument("--preload", action="store_true", help="Load the model before accepting connections")
+    args = parser.parse_args()
+
+    if args.cores:
+        os.sched_setaffinity(0, parse_cores(args.cores))
+    threads = args.threads or len(os.sched_getaffinity(0))
+    # Must happen before torch runs anything in parallel
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    translator = FacebookUrduTranslator(
+        model_name=args.model,
+        max_batch_size=args.max_batch,
+        backend=args.backend,
+        cache_dir=args.cache_dir,
+        default_profile=args.profile
+    )
+    translator.memory = TranslationMemory(args.memory_db, max_entries=args.memory_size)
+    translator.scheduler = TranslationScheduler(translator, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    if args.preload:
+        translator.load_model()
+
+    address, family = parse_service_address(args.address)
+    authkey = os.environ.get("TRANSLATION_SERVICE_KEY", "").encode() or None
+    try:
+        check_service_key(family, authkey)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    if family == "AF_UNIX":
+        if os.path.exists(address):
+            os.unlink(address)
+        authkey = authkey or write_service_key(address)
+
+    with Listener(address, family=family, authkey=authkey) as listener:
+        if family == "AF_UNIX":
+            os.chmod(address, 0o600)
+        print(f"🚀 Translation service listening on {args.address} ({args.backend}, {threads} threads)")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # A client that fails authentication shouldn't take the service down
+                print(f"❌ Rejected connection: {e}")
+                continue
+            threading.Thread(target=handle_connection, args=(conn, translator), daemon=True).start()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Trend-card parsing for trends24 pages
+
+Turns a trends24 page into trend dicts with one of three interchangeable
+backends: "stream" (the standard library's HTMLParser, stopping after the
+first items), "lxml" or "bs4". It has no dependency on the rest of the app,
+so benchmark_parser.py can import it on its own.
+"""
+
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+TREND_LIST_START = re.compile(r"""<\w+[^>]*\sclass=["'][^"']*\btrend-card__list\b""")
+TREND_ITEM_XPATH = '//*[contains(concat(" ", normalize-space(@class), " "), " trend-card__list ")]//li'
+
+class TrendCardParser(HTMLParser):
+    """Streaming parser for `.trend-card__list li` items.
+
+    Collects the text of each item's first `a.trend-link` and first `span`
+    and raises `Done` once `limit` items have been seen, so the rest of the
+    page is never tokenized. With `limit=None` the whole page is read and
+    `cards` also holds every card's `data-timestamp` and its (name, data-count)
+    items, which is what the trend history store ingests.
+    """
+    class Done(Exception):
+        pass
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.items = []
+        self.cards = []
+        self.timestamp = None
+        self.list_tag = None
+        self.list_depth = 0
+        self.li_depth = 0
+        self.link_depth = 0
+        self.span_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.list_depth:
+            if tag == self.list_tag:
+                self.list_depth += 1
+        else:
+            attrs = dict(attrs)
+            if "data-timestamp" in attrs:
+                self.timestamp = attrs["data-timestamp"]
+            if "trend-card__list" in (attrs.get("class") or "").split():
+                self.list_tag = tag
+                self.list_depth = 1
+                self.cards.append({'timestamp': self.timestamp, 'items': []})
+            return
+
+        if tag == "li":
+            self.li_depth += 1
+            if self.li_depth == 1:
+                self.link_text = None
+                self.span_text = None
+                self.volume = None
+            return
+        if not self.li_depth:
+            return
+
+        if self.volume is None:
+            self.volume = dict(attrs).get("data-count")
+
+        if tag == "a":
+            if self.link_depth:
+                self.link_depth += 1
+            elif self.link_text is None and "trend-link" in (dict(attrs).get("class") or "").split():
+                self.link_depth = 1
+                self.link_text = []
+        elif tag == "span":
+            if self.span_depth:
+                self.span_depth += 1
+            elif self.span_text is None:
+                self.span_depth = 1
+                self.span_text = []
+
+    def handle_endtag(self, tag):
+        if not self.list_depth:
+            return
+        if tag == self.list_tag:
+            self.list_depth -= 1
+            return
+        if not self.li_depth:
+            return
+
+        if tag == "a" and self.link_depth:
+            self.link_depth -= 1
+        elif tag == "span" and self.span_depth:
+            self.span_depth -= 1
+        elif tag == "li":
+            self.li_depth -= 1
+            if not self.li_depth:
+                link_text = "".join(self.link_text) if self.link_text is not None else None
+                self.items.append((link_text, "".join(self.span_text or [])))
+                self.cards[-1]['items'].append((link_text, self.volume))
+                if self.limit is not None and len(self.items) >= self.limit:
+                    raise self.Done()
+
+    def handle_data(self, data):
+        if self.link_depth:
+            self.link_text.append(data)
+        if self.span_depth:
+            self.span_text.append(data)
+
+def parse_trends(html_content, backend="stream", limit=20):
+    """Turn the first `limit` trend-card entries into trend dicts.
+
+    Returns (backend used, trends); "lxml" falls back to "stream" when lxml
+    isn't installed.
+    """
+    if backend == "lxml" and lxml_html is not None:
+        items = _parse_items_lxml(html_content, limit)
+    elif backend == "bs4":
+        items = _parse_items_bs4(html_content, limit)
+    else:
+        backend, items = "stream", _parse_items_stream(html_content, limit)
+
+    trends = []
+    for i, (trend_text, trend_count) in enumerate(items):
+        if trend_text is None:
+            continue
+
+        trend_text = trend_text.strip()
+        trend_count = trend_count.strip()
+
+        # Extract numeric count
+        numeric_count = 0
+        if trend_count:
+            match = re.search(r'(\d+)', trend_count)
+            if match:
+                numeric_count = int(match.group(1))
+                trend_count = f"{numeric_count}K"
+
+        trends.append({
+            'rank': i + 1,
+            'name': trend_text,
+            'count': trend_count,
+            'numeric_count': numeric_count
+        })
+
+    return backend, trends
+
+# Each backend returns (link text or None, first span text) per list item,
+# in document order, so parse_trends produces identical dicts for all of them.
+
+def _parse_items_bs4(html_content, limit):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, "html.parser")
+    items = []
+    for trend_item in soup.select(".trend-card__list li")[:limit]:
+        trend_text_element = trend_item.select_one("a.trend-link")
+        trend_count_element = trend_item.select_one("span")
+        items.append((
+            trend_text_element.text if trend_text_element else None,
+            trend_count_element.text if trend_count_element else "",
+        ))
+    return items
+
+def _parse_items_lxml(html_content, limit):
+    root = lxml_html.fromstring(html_content)
+    items = []
+    for trend_item in root.xpath(TREND_ITEM_XPATH)[:limit]:
+        trend_text_element = next(
+            (a for a in trend_item.iter("a") if "trend-link" in a.get("class", "").split()),
+            None,
+        )
+        trend_count_element = trend_item.find(".//span")
+        items.append((
+            trend_text_element.text_content() if trend_text_element is not None else None,
+            trend_count_element.text_content() if trend_count_element is not None else "",
+        ))
+    return items
+
+def _parse_items_stream(html_content, limit):
+    # Skip the stylesheet and header markup and stop after `limit` items
+    match = TREND_LIST_START.search(html_content)
+    if not match:
+        return []
+    parser = TrendCardParser(limit)
+    try:
+        parser.feed(html_content[match.start():])
+        parser.close()
+    except TrendCardParser.Done:
+        pass
+    return parser.items